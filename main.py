@@ -1,313 +1,360 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-import pandas as pd
-import nltk
-import statistics
-from typing import Dict, Tuple
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse
+from pydantic import BaseModel
+import numpy as np
+import math
+import re
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
-# Configuración y carga de datos (sin cambios)
-nltk.data.path.append('C:\\Users\\hemor\\AppData\\Roaming\\nltk_data')
-nltk.download('punkt')
-nltk.download('wordnet')
+# Configuración y carga de datos
+DATASET_PATH = 'Dataset/dataset_consumo_energia_balanceado.csv'
 
 def load_data():
     """
     Carga y prepara el dataset para el análisis.
-    Se seleccionan las columnas relevantes y se normalizan los nombres.
+    Se seleccionan las columnas relevantes y se guardan como arreglos de NumPy por columna
+    (int32/float32, para reducir memoria).
     """
-    data = pd.read_csv('Dataset/dataset_consumo_energia_balanceado.csv')[['Año', 'Mes', 'Personas', 'Consumo']]
-    data.columns = ['Year', 'Month', 'People', 'Consumption']
-    return data.fillna('').to_dict(orient='records')
+    with open(DATASET_PATH, encoding='utf-8') as file:
+        header = file.readline().strip().split(',')
+    data = np.loadtxt(DATASET_PATH, delimiter=',', skiprows=1, encoding='utf-8',
+                      usecols=(header.index('Personas'), header.index('Consumo')),
+                      dtype=[('people', np.int32), ('consumption', np.float32)])
+    return {
+        'people': np.ascontiguousarray(data['people']),
+        'consumption': np.ascontiguousarray(data['consumption'])
+    }
+
+def get_consumption_statistics(consumption: np.ndarray, people: np.ndarray) -> Tuple[float, float]:
+    """
+    Calcula la media y la desviación estándar muestral del consumo por persona.
+    Se ignoran los registros sin personas para evitar divisiones por cero.
+    Los datos pueden venir en precisión reducida; la división y las reducciones se hacen en float64.
+    """
+    mask = people > 0
+    consumptions_per_person = np.divide(consumption[mask], people[mask], dtype=np.float64)
+    return float(consumptions_per_person.mean()), float(consumptions_per_person.std(ddof=1))
 
 energy_data = load_data()
 
-def get_consumption_level(consumption_per_person: float):
+# Las estadísticas históricas no cambian mientras la aplicación está en ejecución,
+# así que se calculan una sola vez al cargar el módulo.
+AVG_CONSUMPTION, STD_CONSUMPTION = get_consumption_statistics(energy_data['consumption'], energy_data['people'])
+LOW_THRESHOLD = AVG_CONSUMPTION - STD_CONSUMPTION
+HIGH_THRESHOLD = AVG_CONSUMPTION + STD_CONSUMPTION
+CONSUMPTION_STATISTICS = {
+    "avg_consumption_per_person": f"{AVG_CONSUMPTION:.2f} kWh",
+    "std_consumption_per_person": f"{STD_CONSUMPTION:.2f} kWh"
+}
+
+# Códigos de nivel de consumo; indexan CONSUMPTION_LEVELS y SPECIFIC_RECOMMENDATIONS.
+LEVEL_BAJO, LEVEL_NORMAL, LEVEL_ALTO = range(3)
+CONSUMPTION_LEVELS = ("bajo", "normal", "alto")
+CONSUMPTION_LEVELS_ARRAY = np.array(CONSUMPTION_LEVELS)
+
+def get_consumption_level_code(consumption_per_person: float) -> int:
     """
-    Determina el nivel de consumo (alto, medio o bajo) basado en estadísticas históricas.
-    Calcula la media y la desviación estándar de consumo por persona.
+    Retorna el código del nivel de consumo comparando contra los umbrales media ± desviación
+    estándar precalculados; la suma de las dos comparaciones es directamente el código.
     """
-    consumptions_per_person = [record['Consumption'] / record['People'] 
-                               for record in energy_data if record['People'] > 0]
-    avg_consumption = statistics.mean(consumptions_per_person)
-    std_consumption = statistics.stdev(consumptions_per_person)
-    if consumption_per_person > (avg_consumption + std_consumption):
-        level = "alto"
-    elif consumption_per_person < (avg_consumption - std_consumption):
-        level = "bajo"
-    else:
-        level = "normal"
-    return level, avg_consumption, std_consumption
+    return int(consumption_per_person >= LOW_THRESHOLD) + int(consumption_per_person > HIGH_THRESHOLD)
+
+def classify_consumption_levels(consumptions_per_person: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de get_consumption_level_code: clasifica muchos consumos por persona a la vez
+    y retorna el nombre del nivel de cada uno. Aplica la misma regla (suma de las dos comparaciones),
+    así que los valores iguales a un umbral se consideran 'normal'.
+    """
+    values = np.asarray(consumptions_per_person, dtype=np.float64)
+    codes = (values >= LOW_THRESHOLD).astype(np.intp) + (values > HIGH_THRESHOLD)
+    return CONSUMPTION_LEVELS_ARRAY[codes]
+
+GENERAL_RECOMMENDATIONS = (
+    "Apaga las luces cuando no estés en la habitación",
+    "Utiliza bombillas LED de bajo consumo",
+    "Desconecta los aparatos electrónicos cuando no los uses",
+    "Aprovecha la luz natural durante el día"
+)
+# Las recomendaciones generales no cambian, así que su bloque de texto para el chat se arma una sola vez.
+GENERAL_RECOMMENDATIONS_TEXT = "\n".join(f"- {rec}" for rec in GENERAL_RECOMMENDATIONS)
 
-def get_recommendations(consumption: float, people: int, price_per_kwh: float) -> Dict[str, list]:
+# Recomendaciones específicas por código de nivel: (antes, plantilla con el consumo por persona, después).
+SPECIFIC_RECOMMENDATIONS = (
+    # LEVEL_BAJO
+    (
+        ("Continúa con tus buenos hábitos de consumo",
+         "Considera instalar paneles solares para ser aún más eficiente"),
+        "El consumo por persona es {:.2f} kWh",
+        ()
+    ),
+    # LEVEL_NORMAL
+    (
+        ("Usa electrodomésticos en horas valle",
+         "Instala temporizadores en equipos de alto consumo"),
+        "El consumo por persona es {:.2f} kWh",
+        ()
+    ),
+    # LEVEL_ALTO
+    (
+        ("Revisa el aislamiento de tu hogar",
+         "Programa el termostato a temperaturas más eficientes"),
+        "El consumo por persona es {:.2f} kWh, intenta reducirlo",
+        ("Realiza una auditoría energética de tu hogar",)
+    )
+)
+
+# Nota de ahorro por código de nivel: (umbral al que se reduciría el consumo por persona, plantilla).
+# El nivel bajo no muestra ahorro.
+SAVINGS_NOTES = (
+    None,
+    (LOW_THRESHOLD,
+     "Tu consumo está bien, pero si quieres mejorar aún más, siguiendo estas recomendaciones podrías ahorrar "
+     "{kwh_excess:.2f} kWh, unos ${money_saved:.2f} al mes (basado en ${price_per_kwh}/kWh)."),
+    (HIGH_THRESHOLD,
+     "Siguiendo estas recomendaciones, podrías ahorrar {kwh_excess:.2f} kWh, "
+     "equivalente a ${money_saved:.2f} al mes (basado en ${price_per_kwh}/kWh).")
+)
+
+@lru_cache(maxsize=2048)
+def get_recommendations(consumption: float, people: int, price_per_kwh: float) -> Dict[str, tuple]:
     """
     Genera recomendaciones personalizadas basadas en el consumo y el número de personas.
     Retorna tanto recomendaciones generales como específicas según el nivel de consumo y a su vez para todos menos para el nivel bajo muestra el ahorro.
     - Para 'alto': calcula el ahorro si se reduce al umbral máximo de 'moderado'.
     - Para 'normal': calcula el ahorro si se reduce al umbral mínimo de 'moderado'.
+    El resultado se memoriza por (consumo, personas, precio), por lo que no debe modificarse.
     """
     consumption_per_person = consumption / people
-    consumption_level, avg_consumption, std_consumption = get_consumption_level(consumption_per_person)
-    general_recommendations = [
-        "Apaga las luces cuando no estés en la habitación",
-        "Utiliza bombillas LED de bajo consumo",
-        "Desconecta los aparatos electrónicos cuando no los uses",
-        "Aprovecha la luz natural durante el día"
-    ]
-    specific_recommendations = {
-        "alto": [
-            "Revisa el aislamiento de tu hogar",
-            "Programa el termostato a temperaturas más eficientes",
-            f"El consumo por persona es {consumption_per_person:.2f} kWh, intenta reducirlo",
-            "Realiza una auditoría energética de tu hogar"
-        ],
-        "normal": [
-            "Usa electrodomésticos en horas valle",
-            "Instala temporizadores en equipos de alto consumo",
-            f"El consumo por persona es {consumption_per_person:.2f} kWh"
-        ],
-        "bajo": [
-            "Continúa con tus buenos hábitos de consumo",
-            "Considera instalar paneles solares para ser aún más eficiente",
-            f"El consumo por persona es {consumption_per_person:.2f} kWh"
-        ]
-    }
-    if consumption_level != "bajo":
-        excess_per_person = 0
-        if consumption_level == "alto":
-            umbral = avg_consumption + std_consumption
-        elif consumption_level == "normal":
-            umbral = avg_consumption - std_consumption
+    level_code = get_consumption_level_code(consumption_per_person)
+    before, template, after = SPECIFIC_RECOMMENDATIONS[level_code]
+    specific_recommendations = [*before, template.format(consumption_per_person), *after]
+    savings_note = SAVINGS_NOTES[level_code]
+    if savings_note is not None:
+        umbral, note_template = savings_note
         excess_per_person = consumption_per_person - umbral
         if excess_per_person > 0:
             kwh_excess = excess_per_person * people
-            money_saved = kwh_excess * price_per_kwh
-            if consumption_level == "alto":
-                note = f"Siguiendo estas recomendaciones, podrías ahorrar {kwh_excess:.2f} kWh, equivalente a ${money_saved:.2f} al mes (basado en ${price_per_kwh}/kWh)."
-            elif consumption_level == "normal":
-                note = f"Tu consumo está bien, pero si quieres mejorar aún más, siguiendo estas recomendaciones podrías ahorrar {kwh_excess:.2f} kWh, unos ${money_saved:.2f} al mes (basado en ${price_per_kwh}/kWh)."
-            specific_recommendations[consumption_level].append(note)
+            specific_recommendations.append(note_template.format(
+                kwh_excess=kwh_excess,
+                money_saved=kwh_excess * price_per_kwh,
+                price_per_kwh=price_per_kwh
+            ))
     
     return {
-        "general": general_recommendations,
-        "specific": specific_recommendations[consumption_level],
-        "consumption_level": consumption_level,
-        "statistics": {
-            "avg_consumption_per_person": f"{avg_consumption:.2f} kWh",
-            "std_consumption_per_person": f"{std_consumption:.2f} kWh"
-        }
+        "general": GENERAL_RECOMMENDATIONS,
+        "specific": tuple(specific_recommendations),
+        "consumption_level": CONSUMPTION_LEVELS[level_code],
+        "statistics": CONSUMPTION_STATISTICS
     }
 
+EXTRA_RECOMMENDATIONS = (
+    "Revisa el mantenimiento de tus equipos de calefacción y refrigeración",
+    "Considera utilizar reguladores de voltaje para optimizar el consumo",
+    "Implementa un sistema de monitoreo para identificar picos de consumo",
+    "Asegúrate de que las ventanas estén bien aisladas",
+    "Evalúa la posibilidad de instalar sistemas de energía renovable, como paneles solares"
+)
+
+# Recomendaciones adicionales asociadas a palabras clave en los detalles del usuario.
+KEYWORD_RECOMMENDATIONS = {
+    "calefacción": "Optimiza el uso de la calefacción, ajusta el termostato y revisa el sistema regularmente.",
+    "iluminación": "Considera instalar sensores de movimiento y temporizadores para la iluminación.",
+    "electrodomésticos": "Revisa la eficiencia energética de tus electrodomésticos y reemplázalos por modelos más eficientes si es posible."
+}
+_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, KEYWORD_RECOMMENDATIONS)), re.IGNORECASE)
+
 def get_additional_recommendations(details: str) -> list:
     """
     Genera recomendaciones adicionales basadas en los detalles extra proporcionados por el usuario.
-    Se detectan palabras clave para personalizar la respuesta.
+    Se detectan palabras clave para personalizar la respuesta en una sola pasada sobre el texto.
     """
-    extra_recommendations = [
-        "Revisa el mantenimiento de tus equipos de calefacción y refrigeración",
-        "Considera utilizar reguladores de voltaje para optimizar el consumo",
-        "Implementa un sistema de monitoreo para identificar picos de consumo",
-        "Asegúrate de que las ventanas estén bien aisladas",
-        "Evalúa la posibilidad de instalar sistemas de energía renovable, como paneles solares"
-    ]
-    if "calefacción" in details.lower():
-        extra_recommendations.append("Optimiza el uso de la calefacción, ajusta el termostato y revisa el sistema regularmente.")
-    if "iluminación" in details.lower():
-        extra_recommendations.append("Considera instalar sensores de movimiento y temporizadores para la iluminación.")
-    if "electrodomésticos" in details.lower():
-        extra_recommendations.append("Revisa la eficiencia energética de tus electrodomésticos y reemplázalos por modelos más eficientes si es posible.")
-    return extra_recommendations
+    found = {match.group(0).lower() for match in _KEYWORD_PATTERN.finditer(details)}
+    return [*EXTRA_RECOMMENDATIONS, *(rec for keyword, rec in KEYWORD_RECOMMENDATIONS.items() if keyword in found)]
 
 # ----------------------------
 # Lógica Conversacional del Chatbot
 # ----------------------------
 
-def process_message(state: dict, message: str) -> Tuple[dict, str]:
+@dataclass(slots=True)
+class Session:
+    """Estado de una conversación: el paso actual y los datos que el usuario ha ido dando."""
+    step: int = 0
+    name: str = "Usuario"
+    people: int = 0
+    consumption: float = 0.0
+    price_per_kwh: float = 0.0
+    details: str = ""
+
+# Respuestas reconocidas del usuario (comparadas en minúsculas).
+GREETINGS = frozenset(("hola", "hi", "holi"))
+AFFIRMATIVE_ANSWERS = frozenset(("sí", "si"))
+
+# Formatos numéricos aceptados; se validan antes de convertir para no lanzar ValueError con entradas inválidas.
+# Los enteros se limitan a 9 dígitos: int() rechaza textos muy largos y un número de personas enorme
+# desbordaría los cálculos en float. Los decimales se revisan además con math.isfinite tras convertir.
+_INT_PATTERN = re.compile(r"[+-]?\d{1,9}")
+_FLOAT_PATTERN = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)")
+
+def _step_greeting(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 0: espera el saludo para comenzar."""
+    if text.lower() in GREETINGS:
+        state.step = 1
+        return state, "¡Hola! ¿Cuál es tu nombre?"
+    return state, "Di 'hola' para comenzar la conversación."
+
+def _step_name(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 1: guarda el nombre del usuario."""
+    state.name = text
+    state.step = 2
+    return state, f"Encantado, {state.name}. ¿Cuántas personas hay en tu hogar?"
+
+def _step_people(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 2: guarda el número de personas en el hogar."""
+    if not _INT_PATTERN.fullmatch(text):
+        return state, "Por favor, ingresa un número válido para el número de personas."
+    people = int(text)
+    if people <= 0:
+        return state, "Por favor, ingresa un número válido de personas (mayor que 0)."
+    state.people = people
+    state.step = 3
+    return state, "Perfecto. ¿Cuál es el consumo mensual en kWh?"
+
+def _step_consumption(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 3: guarda el consumo mensual en kWh."""
+    if not _FLOAT_PATTERN.fullmatch(text):
+        return state, "Por favor, ingresa un número válido para el consumo."
+    consumption = float(text)
+    if not math.isfinite(consumption):
+        return state, "Por favor, ingresa un número válido para el consumo."
+    if consumption <= 0:
+        return state, "El consumo debe ser mayor que 0. Inténtalo de nuevo."
+    state.consumption = consumption
+    state.step = 4
+    return state, "¿Cuál es el costo por kWh en tu región? (Si no lo sabes, puedes dejar el valor predeterminado de $1000 pesos)"
+
+def _step_price(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 4: guarda el costo por kWh, muestra las recomendaciones y pregunta si se desean más detalles."""
+    if text and not _FLOAT_PATTERN.fullmatch(text):
+        return state, "Por favor, ingresa un número válido para el costo por kWh."
+    price_per_kwh = float(text) if text else 1000
+    if not math.isfinite(price_per_kwh):
+        return state, "Por favor, ingresa un número válido para el costo por kWh."
+    if price_per_kwh <= 0:
+        return state, "El costo por kWh debe ser mayor que 0. Inténtalo de nuevo."
+    state.price_per_kwh = price_per_kwh
+    state.step = 5
+    recs = get_recommendations(state.consumption, state.people, state.price_per_kwh)
+    specific_text = "\n".join(f"- {rec}" for rec in recs["specific"])
+    reply = (
+        f"Análisis realizado para {state.name}:\n"
+        f"Consumo mensual: {state.consumption} kWh con {state.people} personas.\n"
+        f"Nivel de consumo: {recs['consumption_level'].capitalize()}\n"
+        f"Recomendaciones generales:\n{GENERAL_RECOMMENDATIONS_TEXT}\n"
+        f"Recomendaciones específicas:\n{specific_text}\n"
+        "¿Deseas proporcionar más detalles para obtener recomendaciones adicionales? (responde 'sí' o 'no')"
+    )
+    return state, reply
+
+def _step_more_details(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 5: espera la respuesta sobre si se desean dar detalles adicionales."""
+    if text.lower() in AFFIRMATIVE_ANSWERS:
+        state.step = 6
+        return state, "Por favor, proporciona más detalles sobre tu situación (ej. problemas específicos o áreas a mejorar):"
+    return Session(), "¡Gracias por utilizar nuestro servicio! Si quieres empezar de nuevo, di 'hola'."
+
+def _step_details(state: Session, text: str) -> Tuple[Session, str]:
+    """Step 6: muestra recomendaciones adicionales según los detalles y finaliza la conversación."""
+    state.details = text
+    extra_recs = get_additional_recommendations(state.details)
+    reply_lines = ["Basado en los detalles que proporcionaste, aquí tienes algunas recomendaciones adicionales:"]
+    reply_lines.extend([f"- {rec}" for rec in extra_recs])
+    reply_lines.append("¡Gracias por utilizar nuestro servicio! Si quieres empezar de nuevo, di 'hola'.")
+    return Session(), "\n".join(reply_lines)
+
+# Manejadores de cada paso de la conversación, indexados por el número de step.
+STEP_HANDLERS = (
+    _step_greeting,
+    _step_name,
+    _step_people,
+    _step_consumption,
+    _step_price,
+    _step_more_details,
+    _step_details
+)
+
+def process_message(state: Session, message: str) -> Tuple[Session, str]:
     """
     Procesa el mensaje del usuario según el estado actual de la conversación.
     Actualiza el estado y retorna la respuesta correspondiente.
     
     Estados definidos:
-      - step 0: Espera el nombre.
-      - step 1: Espera el número de personas en el hogar.
-      - step 2: Espera el consumo mensual en kWh.
-      - step 3: Espera el costo por kWh.
-      - step 4: Muestra recomendaciones y pregunta si se desean más detalles.
+      - step 0: Espera el saludo.
+      - step 1: Espera el nombre.
+      - step 2: Espera el número de personas en el hogar.
+      - step 3: Espera el consumo mensual en kWh.
+      - step 4: Espera el costo por kWh, muestra recomendaciones y pregunta si se desean más detalles.
       - step 5: Espera la respuesta sobre detalles adicionales.
       - step 6: Muestra recomendaciones adicionales y finaliza la conversación.
     """
-    
-    step = state.get("step", 0)
-    reply = ""
-    
-    if step == 0:
-        if message.strip().lower() in ["hola", "hi", "holi"]:
-            state["step"] = 1
-            reply = "¡Hola! ¿Cuál es tu nombre?"
-        else:
-            reply = "Di 'hola' para comenzar la conversación."
-    
-    elif step == 1:
-        state["name"] = message.strip()
-        state["step"] = 2
-        reply = f"Encantado, {state['name']}. ¿Cuántas personas hay en tu hogar?"
-    
-    elif step == 2:
-        try:
-            people = int(message)
-            if people <= 0:
-                reply = "Por favor, ingresa un número válido de personas (mayor que 0)."
-            else:
-                state["people"] = people
-                state["step"] = 3
-                reply = "Perfecto. ¿Cuál es el consumo mensual en kWh?"
-        except ValueError:
-            reply = "Por favor, ingresa un número válido para el número de personas."
-    
-    elif step == 3:
-        try:
-            consumption = float(message)
-            if consumption <= 0:
-                reply = "El consumo debe ser mayor que 0. Inténtalo de nuevo."
-            else:
-                state["consumption"] = consumption
-                state["step"] = 4
-                reply = "¿Cuál es el costo por kWh en tu región? (Si no lo sabes, puedes dejar el valor predeterminado de $1000 pesos)"
-        except ValueError:
-            reply = "Por favor, ingresa un número válido para el consumo."
-    
-    elif step == 4:
-        try:
-            price_per_kwh = float(message) if message.strip() else 1000
-            if price_per_kwh <= 0:
-                reply = "El costo por kWh debe ser mayor que 0. Inténtalo de nuevo."
-            else:
-                state["price_per_kwh"] = price_per_kwh
-                state["step"] = 5
-                recs = get_recommendations(state["consumption"], state["people"], state["price_per_kwh"])
-                reply_lines = [
-                    f"Análisis realizado para {state['name']}:",
-                    f"Consumo mensual: {state['consumption']} kWh con {state['people']} personas.",
-                    f"Nivel de consumo: {recs['consumption_level'].capitalize()}",
-                    "Recomendaciones generales:"
-                ]
-                reply_lines.extend([f"- {rec}" for rec in recs["general"]])
-                reply_lines.append("Recomendaciones específicas:")
-                reply_lines.extend([f"- {rec}" for rec in recs["specific"]])
-                reply_lines.append("¿Deseas proporcionar más detalles para obtener recomendaciones adicionales? (responde 'sí' o 'no')")
-                reply = "\n".join(reply_lines)
-        except ValueError:
-            reply = "Por favor, ingresa un número válido para el costo por kWh."
-    
-    elif step == 5:
-        if message.strip().lower() in ["sí", "si"]:
-            state["step"] = 6
-            reply = "Por favor, proporciona más detalles sobre tu situación (ej. problemas específicos o áreas a mejorar):"
-        else:
-            reply = "¡Gracias por utilizar nuestro servicio! Si quieres empezar de nuevo, di 'hola'."
-            state = {"step": 0, "name": "Usuario"}
-    
-    elif step == 6:
-        state["details"] = message.strip()
-        extra_recs = get_additional_recommendations(state["details"])
-        reply_lines = ["Basado en los detalles que proporcionaste, aquí tienes algunas recomendaciones adicionales:"]
-        reply_lines.extend([f"- {rec}" for rec in extra_recs])
-        reply_lines.append("¡Gracias por utilizar nuestro servicio! Si quieres empezar de nuevo, di 'hola'.")
-        reply = "\n".join(reply_lines)
-        state = {"step": 0, "name": "Usuario"}
-    
-    else:
-        reply = "Lo siento, ha ocurrido un error en la conversación."
-    
-    return state, reply
+    if not 0 <= state.step < len(STEP_HANDLERS):
+        return state, "Lo siento, ha ocurrido un error en la conversación."
+    return STEP_HANDLERS[state.step](state, message.strip())
 
 # ----------------------------
 # Endpoints de FastAPI
 # ----------------------------
 
 app = FastAPI()
+# Comprime la página y las respuestas largas del chat (p. ej. las recomendaciones) si el cliente lo acepta.
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# La página del chat es un archivo estático: se lee del disco una sola vez al cargar el módulo.
+# Cada petición usa una respuesta nueva porque los middlewares (p. ej. GZip) modifican los encabezados en sitio.
+CHAT_PAGE_PATH = 'static/index.html'
+with open(CHAT_PAGE_PATH, 'rb') as file:
+    CHAT_PAGE_BYTES = file.read()
 
 @app.get("/", response_class=HTMLResponse)
 async def chat_page():
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Chatbot de Consumo Energético</title>
-        <style>
-            body { font-family: Arial, sans-serif; background-color: #f2f2f2; }
-            #chat-container { width: 60%; margin: auto; margin-top: 50px; background-color: #fff; padding: 20px; border-radius: 5px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }
-            #chat-log { height: 400px; overflow-y: scroll; border: 1px solid #ccc; padding: 10px; white-space: pre-wrap; }
-            .message { margin: 10px 0; }
-            .user { color: blue; }
-            .bot { color: green; }
-            #input-form { margin-top: 20px; }
-        </style>
-    </head>
-    <body>
-        <div id="chat-container">
-            <h1>Chatbot de Consumo Energético</h1>
-            <div id="chat-log"></div>
-            <form id="input-form">
-                <input type="text" id="user-input" placeholder="Escribe tu mensaje aquí" style="width:80%;" autocomplete="off" required/>
-                <button type="submit">Enviar</button>
-            </form>
-        </div>
-        
-        <script>
-            // Estado inicial de la conversación
-            let state = { "step": 0, "name": "Usuario" };
-            
-            // Función para añadir mensajes al registro del chat
-            function appendMessage(sender, message) {
-                const chatLog = document.getElementById("chat-log");
-                const messageDiv = document.createElement("div");
-                messageDiv.classList.add("message");
-                messageDiv.classList.add(sender === "PowerBot" ? "bot" : "user");
-                messageDiv.textContent = sender.toUpperCase() + ": " + message;
-                chatLog.appendChild(messageDiv);
-                chatLog.scrollTop = chatLog.scrollHeight;
-            }
-            
-            // Mensaje inicial del bot al cargar la página
-            window.onload = function() {
-                appendMessage("PowerBot", "Di 'hola' para comenzar la conversación.");
-            };
-            
-            // Manejo del envío del formulario
-            document.getElementById("input-form").addEventListener("submit", function(e) {
-                e.preventDefault();
-                const userInput = document.getElementById("user-input");
-                const message = userInput.value;
-                appendMessage(state.name, message); // Usar el nombre del estado
-                userInput.value = "";
-                
-                // Enviar mensaje y estado al endpoint /chat
-                fetch("/chat", {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json"
-                    },
-                    body: JSON.stringify({ "state": state, "message": message })
-                })
-                .then(response => response.json())
-                .then(data => {
-                    state = data.state; // Actualizar el estado con el nombre
-                    appendMessage("PowerBot", data.reply);
-                })
-                .catch(error => {
-                    console.error("Error:", error);
-                    appendMessage("PowerBot", "Ocurrió un error, intenta de nuevo.");
-                });
-            });
-        </script>
-    </body>
-    </html>
+    return HTMLResponse(content=CHAT_PAGE_BYTES, headers={"Cache-Control": "public, max-age=3600"})
+
+# Estado de cada conversación indexado por id de sesión. Vive en la memoria del proceso,
+# por lo que con varios workers haría falta un almacén compartido (p. ej. Redis).
+# Se ordena por último uso para descartar las conversaciones abandonadas más antiguas.
+MAX_SESSIONS = 10_000
+sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+class ChatRequest(BaseModel):
+    """Cuerpo de /chat: id de la conversación (si ya existe) y mensaje del usuario."""
+    session_id: Optional[str] = None
+    message: str = ""
+
+class ChatResponse(BaseModel):
+    """Respuesta de /chat. Al declararla como response_model, FastAPI la serializa a JSON directamente con Pydantic."""
+    session_id: str
+    name: str
+    reply: str
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(payload: ChatRequest):
+    """
+    Procesa un mensaje de la conversación identificada por 'session_id'.
+    Si el id no existe (o no se envía) se inicia una conversación nueva con un id generado por el servidor.
     """
-    return HTMLResponse(content=html_content)
-
-@app.post("/chat")
-async def chat_endpoint(payload: dict):
-    state = payload.get("state", {"step": 0})
-    message = payload.get("message", "")
-    new_state, reply = process_message(state, message)
-    return JSONResponse(content={"state": new_state, "reply": reply})
\ No newline at end of file
+    session_id = payload.session_id
+    if session_id in sessions:
+        state = sessions[session_id]
+        sessions.move_to_end(session_id)
+    else:
+        session_id = uuid.uuid4().hex
+        state = Session()
+        if len(sessions) >= MAX_SESSIONS:
+            sessions.popitem(last=False)
+    new_state, reply = process_message(state, payload.message)
+    sessions[session_id] = new_state
+    return {"session_id": session_id, "name": new_state.name, "reply": reply}
\ No newline at end of file